@@ -3,53 +3,68 @@ Database Helper Functions
 
 MongoDB helper functions ready to use in your backend code.
 Import and use these functions in your API endpoints for database operations.
+All helpers are async (Motor driver) so handlers awaiting them never block
+a worker thread on network I/O.
 """
 
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
 from datetime import datetime, timezone
 import os
 from dotenv import load_dotenv
+from functools import lru_cache
 from typing import Union
 from pydantic import BaseModel
 
 # Load environment variables from .env file
 load_dotenv()
 
-_client = None
 db = None
 
 database_url = os.getenv("DATABASE_URL")
 database_name = os.getenv("DATABASE_NAME")
 
+@lru_cache(maxsize=1)
+def get_client():
+    """Single shared client per process; its pool serves all requests"""
+    return AsyncIOMotorClient(database_url, maxPoolSize=100, minPoolSize=10)
+
 if database_url and database_name:
-    _client = MongoClient(database_url)
-    db = _client[database_name]
+    db = get_client()[database_name]
 
-# Helper functions for common database operations
-def create_document(collection_name: str, data: Union[BaseModel, dict]):
-    """Insert a single document with timestamp"""
+@lru_cache(maxsize=None)
+def get_collection(collection_name: str):
+    """Memoized collection handle: resolve db[name] once per collection"""
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+    return db[collection_name]
 
-    # Convert Pydantic model to dict if needed
+# Helper functions for common database operations
+async def create_document(collection_name: str, data: Union[BaseModel, dict]):
+    """Insert a single document with timestamp"""
+    # Convert Pydantic model to dict if needed. pymongo BSON-encodes from
+    # native Python types, so call the Rust serializer directly rather
+    # than going through the model_dump() wrapper (model_dump_json would
+    # produce a JSON string Mongo can't take)
     if isinstance(data, BaseModel):
-        data_dict = data.model_dump()
+        data_dict = type(data).__pydantic_serializer__.to_python(data, mode="python")
     else:
         data_dict = data.copy()
 
     data_dict['created_at'] = datetime.now(timezone.utc)
     data_dict['updated_at'] = datetime.now(timezone.utc)
 
-    result = db[collection_name].insert_one(data_dict)
+    result = await get_collection(collection_name).insert_one(data_dict)
     return str(result.inserted_id)
 
-def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
+async def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None, projection: dict = None,
+                        sort: list = None, batch_size: int = None):
     """Get documents from collection"""
-    if db is None:
-        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
-    
-    cursor = db[collection_name].find(filter_dict or {})
+    cursor = get_collection(collection_name).find(filter_dict or {}, projection)
+    if sort:
+        cursor = cursor.sort(sort)
+    if batch_size:
+        cursor = cursor.batch_size(batch_size)
     if limit:
         cursor = cursor.limit(limit)
-    
-    return list(cursor)
+
+    return await cursor.to_list(length=limit)
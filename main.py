@@ -1,139 +1,275 @@
+import asyncio
 import os
-from fastapi import FastAPI, HTTPException, Depends, Request
+import time
+import orjson
+import redis.asyncio as aioredis
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from pymongo import WriteConcern
 from typing import List, Optional
 from datetime import datetime
 
-from database import db, create_document, get_documents
+from database import db, create_document, get_documents, get_collection
 from schemas import MenuItem, Special, GalleryImage, Testimonial, ContactMessage, Reservation, AnalyticsEvent
 
-app = FastAPI(title="Éclat Dining API", version="1.0.0")
+app = FastAPI(title="Éclat Dining API", version="1.0.0", default_response_class=ORJSONResponse)
+
+# Optional Redis cache for public content (menu/gallery change rarely)
+redis_url = os.getenv("REDIS_URL")
+redis_client = aioredis.from_url(redis_url) if redis_url else None
+CACHE_TTL = 300  # seconds
+
+async def cache_get(key: str):
+    if redis_client is None:
+        return None
+    try:
+        return await redis_client.get(key)
+    except Exception:
+        return None
+
+async def cache_set(key: str, blob: bytes):
+    if redis_client is None:
+        return
+    try:
+        await redis_client.setex(key, CACHE_TTL, blob)
+    except Exception:
+        pass
+
+async def cache_invalidate(pattern: str):
+    if redis_client is None:
+        return
+    try:
+        async for key in redis_client.scan_iter(match=pattern):
+            await redis_client.delete(key)
+    except Exception:
+        pass
+
+# Large JSON arrays (menu, reservations) compress 5-10x
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+# Static origin allowlist lets preflight responses be computed once;
+# wildcard + credentials is rejected by browsers anyway
+allowed_origins = os.getenv("ALLOWED_ORIGINS", "*").split(",")
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
+    allow_origins=allowed_origins,
+    allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
-@app.get("/")
-def read_root():
-    return {"message": "Éclat Dining API running"}
+# Analytics batching: events are queued in-process and flushed in bulk
+ANALYTICS_BATCH = 200
+ANALYTICS_FLUSH_SECONDS = 0.05
+
+async def drain_analytics(queue: asyncio.Queue):
+    """Flush queued analytics events to Mongo in insert_many batches"""
+    # Telemetry doesn't need durability: w=0 skips waiting for the
+    # primary's ack (reservations/contacts keep the default concern)
+    coll = db.get_collection(collection_name(AnalyticsEvent), write_concern=WriteConcern(w=0))
+    while True:
+        batch = [await queue.get()]
+        deadline = time.monotonic() + ANALYTICS_FLUSH_SECONDS
+        while len(batch) < ANALYTICS_BATCH:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout=timeout))
+            except asyncio.TimeoutError:
+                break
+        try:
+            # bypass_document_validation is not allowed with w=0
+            await coll.insert_many(batch, ordered=False)
+        except Exception:
+            pass  # best-effort telemetry; drop the batch rather than crash the consumer
+
+@app.on_event("startup")
+async def start_analytics_consumer():
+    app.state.analytics_q = asyncio.Queue(maxsize=10000)
+    if db is not None:
+        asyncio.create_task(drain_analytics(app.state.analytics_q))
+
+@app.on_event("startup")
+async def create_indexes():
+    # Cover each endpoint's filter so reads stay O(log N) instead of a
+    # collection scan; background=True avoids blocking startup on large
+    # existing collections
+    if db is not None:
+        await db["menuitem"].create_index([("category", 1), ("featured", 1)], background=True)
+        await db["special"].create_index("active", background=True)
+        await db["testimonial"].create_index("featured", background=True)
+        await db["reservation"].create_index([("created_at", -1)], background=True)
+
+# Constant body: skip response-model validation and JSON encoding entirely
+_ROOT_BODY = orjson.dumps({"message": "Éclat Dining API running"})
+
+@app.get("/", response_class=Response)
+async def read_root():
+    return Response(_ROOT_BODY, media_type="application/json")
 
 # Utility to map model to collection name
 
 def collection_name(model_cls):
     return model_cls.__name__.lower()
 
+# pydantic-core Rust serializers, resolved once; mode='python' keeps
+# datetime objects so pymongo can BSON-encode them
+_menu_item_ser = MenuItem.__pydantic_serializer__
+_analytics_ser = AnalyticsEvent.__pydantic_serializer__
+
 # Public content endpoints
-@app.get("/api/menu", response_model=List[MenuItem])
-def get_menu(category: Optional[str] = None, featured: Optional[bool] = None):
+@app.get("/api/menu", responses={200: {"model": List[MenuItem]}})
+async def get_menu(category: Optional[str] = None, featured: Optional[bool] = None) -> ORJSONResponse:
+    key = f"menu:{category}:{featured}"
+    if (blob := await cache_get(key)) is not None:
+        return Response(blob, media_type="application/json")
     flt = {}
     if category:
         flt["category"] = category
     if featured is not None:
         flt["featured"] = featured
-    items = get_documents(collection_name(MenuItem), flt)
-    # Convert Mongo docs to pydantic-friendly dicts
-    cleaned = []
-    for it in items:
-        it.pop("_id", None)
-        cleaned.append(MenuItem(**it))
-    return cleaned
-
-@app.get("/api/specials", response_model=List[Special])
-def get_specials(active: Optional[bool] = True):
+    # _id is excluded by projection; docs were validated on insert
+    docs = await get_documents(collection_name(MenuItem), flt, projection={"_id": 0})
+    blob = orjson.dumps(docs)
+    await cache_set(key, blob)
+    return Response(blob, media_type="application/json")
+
+@app.get("/api/specials", responses={200: {"model": List[Special]}})
+async def get_specials(active: Optional[bool] = True) -> ORJSONResponse:
+    key = f"specials:{active}"
+    if (blob := await cache_get(key)) is not None:
+        return Response(blob, media_type="application/json")
     flt = {"active": True} if active else {}
-    docs = get_documents(collection_name(Special), flt)
-    out = []
-    for d in docs:
-        d.pop("_id", None)
-        out.append(Special(**d))
-    return out
-
-@app.get("/api/gallery", response_model=List[GalleryImage])
-def get_gallery():
-    docs = get_documents(collection_name(GalleryImage))
-    out = []
-    for d in docs:
-        d.pop("_id", None)
-        out.append(GalleryImage(**d))
-    return out
-
-@app.get("/api/testimonials", response_model=List[Testimonial])
-def get_testimonials():
-    docs = get_documents(collection_name(Testimonial), {"featured": True})
-    out = []
-    for d in docs:
-        d.pop("_id", None)
-        out.append(Testimonial(**d))
-    return out
+    docs = await get_documents(collection_name(Special), flt, projection={"_id": 0})
+    blob = orjson.dumps(docs)
+    await cache_set(key, blob)
+    return Response(blob, media_type="application/json")
+
+@app.get("/api/gallery", responses={200: {"model": List[GalleryImage]}})
+async def get_gallery() -> ORJSONResponse:
+    if (blob := await cache_get("gallery")) is not None:
+        return Response(blob, media_type="application/json")
+    docs = await get_documents(collection_name(GalleryImage), projection={"_id": 0})
+    blob = orjson.dumps(docs)
+    await cache_set("gallery", blob)
+    return Response(blob, media_type="application/json")
+
+@app.get("/api/testimonials", responses={200: {"model": List[Testimonial]}})
+async def get_testimonials() -> ORJSONResponse:
+    if (blob := await cache_get("testimonials")) is not None:
+        return Response(blob, media_type="application/json")
+    docs = await get_documents(collection_name(Testimonial), {"featured": True}, projection={"_id": 0})
+    blob = orjson.dumps(docs)
+    await cache_set("testimonials", blob)
+    return Response(blob, media_type="application/json")
 
 # Forms
 @app.post("/api/contact")
-def submit_contact(payload: ContactMessage):
-    ref = create_document(collection_name(ContactMessage), payload)
+async def submit_contact(payload: ContactMessage):
+    ref = await create_document(collection_name(ContactMessage), payload)
     return {"status": "ok", "reference": ref}
 
 class ReservationRequest(Reservation):
     pay_now: Optional[bool] = False
 
+_reservation_ser = ReservationRequest.__pydantic_serializer__
+# SchemaValidator built once per process; validate_json parses straight
+# from the raw body, skipping FastAPI's per-request validation plumbing
+_reservation_adapter = TypeAdapter(ReservationRequest)
+
 @app.post("/api/reservations")
-def submit_reservation(payload: ReservationRequest):
+async def submit_reservation(request: Request):
+    try:
+        payload = _reservation_adapter.validate_json(await request.body())
+    except ValidationError as e:
+        # Match FastAPI's 422 shape: no raw input echoed back (it may be
+        # non-JSON-serializable bytes) and loc prefixed with "body"
+        errors = [
+            {**err, "loc": ["body", *err["loc"]]}
+            for err in e.errors(include_url=False, include_input=False)
+        ]
+        raise HTTPException(422, detail=errors)
     # Payment placeholder integration (Stripe/Razorpay)
     payment_reference = None
     if payload.pay_now:
         # In real integration, create payment intent/order here and return client secret/order id
-        payment_reference = f"PAY-{int(datetime.utcnow().timestamp())}"
-    data = payload.model_dump()
+        # time_ns avoids the datetime allocation + float round-trip of utcnow().timestamp()
+        payment_reference = f"PAY-{time.time_ns() // 1_000_000_000}"
+    data = _reservation_ser.to_python(payload, mode="python")
     data["payment_reference"] = payment_reference
-    ref = create_document(collection_name(Reservation), data)
+    ref = await create_document(collection_name(Reservation), data)
     return {"status": "ok", "reference": ref, "payment_reference": payment_reference}
 
 # Lightweight analytics
 @app.post("/api/analytics")
-def track_analytics(event: AnalyticsEvent, request: Request):
-    data = event.model_dump()
+async def track_analytics(event: AnalyticsEvent, request: Request):
+    data = _analytics_ser.to_python(event, mode="python")
     data["ip"] = request.client.host if request.client else None
-    data["received_at"] = datetime.utcnow().isoformat()
-    ref = create_document(collection_name(AnalyticsEvent), data)
-    return {"status": "ok", "ref": ref}
+    # Epoch seconds: one syscall, no datetime/str allocation per event
+    data["received_at"] = time.time()
+    # Best-effort telemetry: queue for the batched consumer, never block
+    try:
+        request.app.state.analytics_q.put_nowait(data)
+    except asyncio.QueueFull:
+        return {"status": "dropped"}
+    return {"status": "queued"}
 
 # Admin utilities (no auth for demo; add auth before production)
 class MenuImport(BaseModel):
     items: List[MenuItem]
 
 @app.post("/admin/import-menu")
-def import_menu(payload: MenuImport):
+async def import_menu(payload: MenuImport):
     if db is None:
         raise HTTPException(500, detail="Database not available")
-    coll = db[collection_name(MenuItem)]
-    docs = []
-    for it in payload.items:
-        d = it.model_dump()
-        d["created_at"] = datetime.utcnow()
-        d["updated_at"] = datetime.utcnow()
-        docs.append(d)
+    coll = get_collection(collection_name(MenuItem))
+    now = datetime.utcnow()
+    docs = [{**_menu_item_ser.to_python(it, mode="python"), "created_at": now, "updated_at": now} for it in payload.items]
     if docs:
-        coll.insert_many(docs)
+        # Pydantic already validated the items; let Mongo parallelize the batch
+        await coll.insert_many(docs, ordered=False, bypass_document_validation=True)
+    await cache_invalidate("menu:*")
     return {"message": f"Imported {len(docs)} menu items"}
 
 @app.get("/admin/reservations")
-def list_reservations(limit: int = 100):
-    docs = get_documents(collection_name(Reservation), {}, limit)
-    out = []
-    for d in docs:
-        d.pop("_id", None)
-        out.append(d)
-    # Sort latest first if timestamps exist
-    out.sort(key=lambda x: x.get("created_at", datetime.min), reverse=True)
-    return out
+async def list_reservations(limit: int = 100) -> StreamingResponse:
+    if db is None:
+        raise HTTPException(500, detail="Database not available")
+    # Sort latest first in Mongo (indexed on created_at) and stream the
+    # cursor as NDJSON so large exports never sit in memory at once
+    cursor = (
+        get_collection(collection_name(Reservation))
+        .find({}, {"_id": 0})
+        .sort("created_at", -1)
+        .batch_size(200)
+        .limit(limit)
+    )
+
+    async def gen():
+        async for d in cursor:
+            yield orjson.dumps(d) + b"\n"
+
+    return StreamingResponse(gen(), media_type="application/x-ndjson")
 
 # Health check + DB check
-@app.get("/test")
-def test_database():
+# Env vars are static per process; resolve the flags once at import
+_DB_URL_FLAG = "✅ Set" if os.getenv("DATABASE_URL") else "❌ Not Set"
+_DB_NAME_FLAG = "✅ Set" if os.getenv("DATABASE_NAME") else "❌ Not Set"
+_HEALTH_TTL = 5  # seconds
+_health_cache = {"ts": 0.0, "body": None}
+
+@app.get("/test", response_class=Response)
+async def test_database():
+    # Load balancers poll this several times a second; only re-run the
+    # Mongo check when the cached result is stale. The body is cached as
+    # pre-encoded bytes so a hit returns without serializing anything.
+    if _health_cache["body"] is not None and time.monotonic() - _health_cache["ts"] < _HEALTH_TTL:
+        return Response(_health_cache["body"], media_type="application/json")
     response = {
         "backend": "✅ Running",
         "database": "❌ Not Available",
@@ -145,11 +281,11 @@ def test_database():
     try:
         if db is not None:
             response["database"] = "✅ Available"
-            response["database_url"] = "✅ Set" if os.getenv("DATABASE_URL") else "❌ Not Set"
+            response["database_url"] = _DB_URL_FLAG
             response["database_name"] = db.name if hasattr(db, 'name') else "✅ Connected"
             response["connection_status"] = "Connected"
             try:
-                collections = db.list_collection_names()
+                collections = await db.list_collection_names()
                 response["collections"] = collections[:10]
                 response["database"] = "✅ Connected & Working"
             except Exception as e:
@@ -159,11 +295,21 @@ def test_database():
     except Exception as e:
         response["database"] = f"❌ Error: {str(e)[:50]}"
 
-    response["database_url"] = "✅ Set" if os.getenv("DATABASE_URL") else "❌ Not Set"
-    response["database_name"] = "✅ Set" if os.getenv("DATABASE_NAME") else "❌ Not Set"
-    return response
+    response["database_url"] = _DB_URL_FLAG
+    response["database_name"] = _DB_NAME_FLAG
+    body = orjson.dumps(response)
+    _health_cache["body"] = body
+    _health_cache["ts"] = time.monotonic()
+    return Response(body, media_type="application/json")
 
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=port,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 2)),
+    )
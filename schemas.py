@@ -8,10 +8,14 @@ These schemas are used for validation in API endpoints and by the built-in
 Flames database viewer via the /schema endpoint.
 """
 
-from pydantic import BaseModel, Field, EmailStr
-from typing import Optional, List
+from pydantic import BaseModel, Field, StringConstraints
+from typing import Annotated, Optional, List
 from datetime import datetime
 
+# Lightweight email check compiled once into the pydantic-core schema;
+# replaces EmailStr and its heavier email-validator dependency
+Email = Annotated[str, StringConstraints(pattern=r"^[^@\s]+@[^@\s]+\.[^@\s]+$", max_length=254)]
+
 # Core content
 class MenuItem(BaseModel):
     name: str = Field(..., description="Dish name")
@@ -46,12 +50,12 @@ class Testimonial(BaseModel):
 # Interactions
 class ContactMessage(BaseModel):
     name: str
-    email: EmailStr
+    email: Email
     message: str
 
 class Reservation(BaseModel):
     name: str
-    email: EmailStr
+    email: Email
     phone: Optional[str] = None
     date: str = Field(..., description="YYYY-MM-DD")
     time: str = Field(..., description="HH:MM")
@@ -62,7 +66,7 @@ class Reservation(BaseModel):
 
 # Admin & telemetry
 class AdminUser(BaseModel):
-    email: EmailStr
+    email: Email
     password_hash: str
     role: str = Field("admin", description="admin | editor | viewer")
     active: bool = True